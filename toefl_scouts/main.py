@@ -1,8 +1,11 @@
 """Main entry point for TOEFL Reddit Scout"""
 
 import logging
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Optional, Pattern
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
@@ -12,6 +15,7 @@ from src.reddit_scraper import RedditScraper
 from src.content_analyzer import ContentAnalyzer
 from src.discord_notifier import DiscordNotifier
 from src.database import Database
+from src.models import Comment, Post
 
 # Configure logging
 logging.basicConfig(
@@ -25,57 +29,80 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def meets_post_criteria(post: dict, config: Config) -> bool:
-    """Check if post meets filtering criteria
+def compile_keyword_pattern(keywords: List[str]) -> Optional[Pattern]:
+    """Compile keywords into a single alternation regex of lowercased keywords
+    
+    The pattern itself is case-sensitive; match it against lowercased text
+    (e.g. Post.text_lower).
     
     Args:
-        post: Post dictionary
-        config: Configuration object
+        keywords: Keywords to match
         
     Returns:
-        True if post meets criteria
+        Compiled pattern, or None if no keywords are configured
     """
-    # Check upvotes
-    if post['score'] < config.min_upvotes:
-        return False
-    
-    # Check comments
-    if post['num_comments'] < config.min_comments:
-        return False
+    if not keywords:
+        return None
     
-    # Check keywords (if any configured)
-    keywords = config.keywords
-    if keywords:
-        text = (post['title'] + ' ' + post['selftext']).lower()
-        if not any(keyword.lower() in text for keyword in keywords):
-            return False
-    
-    return True
+    return re.compile('|'.join(re.escape(keyword.lower()) for keyword in keywords))
 
 
-def meets_comment_criteria(comment: dict, config: Config) -> bool:
-    """Check if comment meets filtering criteria
+def filter_posts(
+    posts: List[Post], 
+    config: Config, 
+    keyword_pattern: Optional[Pattern]
+) -> List[Post]:
+    """Keep posts that meet filtering criteria
+    
+    Thresholds are read from config once per batch, and the cheap numeric
+    checks run before the keyword scan.
     
     Args:
-        comment: Comment dictionary
+        posts: List of posts
         config: Configuration object
+        keyword_pattern: compile_keyword_pattern(config.keywords); None only when
+            no keywords are configured
         
     Returns:
-        True if comment meets criteria
+        List of posts that meet criteria
     """
-    # Check score
-    if comment['score'] < config.min_comment_score:
-        return False
+    min_upvotes = config.min_upvotes
+    min_comments = config.min_comments
     
-    # Skip very short comments
-    if len(comment['body']) < 50:
-        return False
+    return [
+        post for post in posts
+        # Check upvotes and comments
+        if post.score >= min_upvotes
+        and post.num_comments >= min_comments
+        # Check keywords (if any configured) in a single pass over the text
+        and (
+            keyword_pattern is None 
+            or keyword_pattern.search(post.text_lower)
+        )
+    ]
+
+
+def filter_comments(comments: List[Comment], config: Config) -> List[Comment]:
+    """Keep comments that meet filtering criteria
     
-    # Skip deleted/removed comments
-    if comment['body'] in ['[deleted]', '[removed]']:
-        return False
+    Args:
+        comments: List of comments
+        config: Configuration object
+        
+    Returns:
+        List of comments that meet criteria
+    """
+    min_comment_score = config.min_comment_score
     
-    return True
+    return [
+        comment for comment in comments
+        # Check score
+        if comment.score >= min_comment_score
+        # Skip very short comments
+        and len(comment.body) >= 50
+        # Skip deleted/removed comments
+        and comment.body not in ('[deleted]', '[removed]')
+    ]
 
 
 def main():
@@ -84,6 +111,11 @@ def main():
     logger.info("TOEFL Reddit Scout - Starting")
     logger.info("=" * 60)
     
+    analyzer = None
+    db = None
+    notifier = None
+    scraper = None
+    
     try:
         # ═══════════ Initialize ═══════════
         logger.info("Loading configuration...")
@@ -91,20 +123,38 @@ def main():
         logger.info(f"Monitoring: {', '.join(config.subreddits)}")
         logger.info(f"TTL: {config.ttl_days} days")
         
-        # Initialize modules
-        scraper = RedditScraper(user_agent=config.reddit_user_agent)
+        # Initialize modules (independent setup, so run them concurrently)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            db_future = executor.submit(Database, db_path=config.database_path)
+            scraper_future = executor.submit(
+                RedditScraper, 
+                user_agent=config.reddit_user_agent,
+                cache_path=config.response_cache_path,
+                cache_max_age_days=config.ttl_days
+            )
+            analyzer_future = executor.submit(
+                ContentAnalyzer,
+                api_key=config.gemini_api_key,
+                model=config.gemini_model,
+                temperature=config.gemini_temperature,
+                concurrency=config.gemini_concurrency,
+                batch_size=config.gemini_batch_size
+            )
+            notifier_future = executor.submit(
+                DiscordNotifier, 
+                webhook_url=config.discord_webhook_url
+            )
         
-        analyzer = ContentAnalyzer(
-            api_key=config.gemini_api_key,
-            model=config.gemini_model,
-            temperature=config.gemini_temperature
+        # Leaving the block waited for every constructor. Bind each one that
+        # succeeded before re-raising a failure, so the finally block closes it
+        setup_futures = (db_future, scraper_future, analyzer_future, notifier_future)
+        db, scraper, analyzer, notifier = (
+            None if future.exception() else future.result()
+            for future in setup_futures
         )
-        
-        notifier = DiscordNotifier(webhook_url=config.discord_webhook_url)
-        db = Database(db_path=config.database_path)
-        
-        # Cleanup old records first (TTL)
-        db.cleanup_old_records(days=config.ttl_days)
+        for future in setup_futures:
+            if future.exception():
+                raise future.exception()
         
         # ═══════════ Fetch Posts ═══════════
         logger.info("")
@@ -112,12 +162,20 @@ def main():
         logger.info("PHASE 1: Fetching Posts")
         logger.info("=" * 60)
         
-        # Fetch posts using optimized strategy (hot + rising + top + new)
-        posts = scraper.fetch_posts(
-            subreddits=config.subreddits,
-            time_filter=config.time_filter,
-            limit=config.post_limit
-        )
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Cleanup old records (TTL) while the Reddit requests are in flight
+            cleanup_future = executor.submit(db.cleanup_old_records, days=config.ttl_days)
+            
+            # Fetch posts using optimized strategy (hot + rising + top + new)
+            posts = scraper.fetch_posts(
+                subreddits=config.subreddits,
+                time_filter=config.time_filter,
+                limit=config.post_limit
+            )
+            
+            # DB filter below must see the cleaned-up table
+            cleanup_future.result()
+        
         logger.info(f"Fetched {len(posts)} posts")
         
         # Filter 1: Remove posts already pushed to Discord (Database)
@@ -125,7 +183,8 @@ def main():
         logger.info(f"After DB filter: {len(posts)} posts")
         
         # Filter 2: Apply criteria (upvotes, comments, keywords)
-        posts = [p for p in posts if meets_post_criteria(p, config)]
+        keyword_pattern = compile_keyword_pattern(config.keywords)
+        posts = filter_posts(posts, config, keyword_pattern)
         logger.info(f"After criteria filter: {len(posts)} posts")
         
         # ═══════════ Fetch Comments ═══════════
@@ -142,7 +201,7 @@ def main():
         logger.info(f"Fetched {len(comments)} comments")
         
         # Apply criteria
-        comments = [c for c in comments if meets_comment_criteria(c, config)]
+        comments = filter_comments(comments, config)
         logger.info(f"After criteria filter: {len(comments)} comments")
         
         # ═══════════ Analyze with Gemini ═══════════
@@ -151,22 +210,15 @@ def main():
         logger.info("PHASE 3: Gemini Analysis")
         logger.info("=" * 60)
         
-        top_posts = []
-        top_comments = []
+        # Posts and comments are analyzed concurrently under one rate limit
+        logger.info(f"Analyzing {len(posts)} posts and {len(comments)} comments...")
+        analyzed_posts, analyzed_comments = analyzer.analyze_all(posts, comments)
         
-        # Analyze posts
-        if posts:
-            logger.info(f"Analyzing {len(posts)} posts...")
-            analyzed_posts = analyzer.analyze_posts_batch(posts)
-            top_posts = analyzer.rank_post_opportunities(analyzed_posts)[:config.top_n]
-            logger.info(f"TOP {len(top_posts)} posts selected")
+        top_posts = analyzer.rank_post_opportunities(analyzed_posts, config.top_n)
+        logger.info(f"TOP {len(top_posts)} posts selected")
         
-        # Analyze comments
-        if comments:
-            logger.info(f"Analyzing {len(comments)} comments...")
-            analyzed_comments = analyzer.analyze_comments_batch(comments)
-            top_comments = analyzer.rank_comment_opportunities(analyzed_comments)[:config.top_n]
-            logger.info(f"TOP {len(top_comments)} comments selected")
+        top_comments = analyzer.rank_comment_opportunities(analyzed_comments, config.top_n)
+        logger.info(f"TOP {len(top_comments)} comments selected")
         
         # ═══════════ Send to Discord ═══════════
         logger.info("")
@@ -202,6 +254,16 @@ def main():
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
         sys.exit(1)
+    
+    finally:
+        if analyzer is not None:
+            analyzer.close()
+        if notifier is not None:
+            notifier.close()
+        if scraper is not None:
+            scraper.close()
+        if db is not None:
+            db.close()
 
 
 if __name__ == "__main__":
@@ -2,13 +2,45 @@
 
 import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Any
 from dotenv import load_dotenv
 
+# Prefer the libyaml-backed loader when available
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+@lru_cache(maxsize=4)
+def _load_yaml(path: str, mtime: float) -> dict:
+    """Parse a YAML file, memoized on path and modification time
+    
+    Args:
+        path: Path to YAML file
+        mtime: File modification time (part of the cache key only)
+        
+    Returns:
+        Parsed YAML (shared between callers, do not mutate)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
 class Config:
     """Configuration loader and validator"""
     
+    __slots__ = (
+        'config',
+        'reddit_user_agent', 'subreddits', 'post_limit', 'time_filter',
+        'gemini_api_key', 'gemini_model', 'gemini_max_tokens', 'gemini_temperature',
+        'gemini_concurrency', 'gemini_batch_size',
+        'min_upvotes', 'min_comments', 'min_comment_score', 'keywords',
+        'ttl_days', 'discord_webhook_url', 'top_n',
+    )
+    
     def __init__(self, config_path: str = None):
         """Initialize configuration
         
@@ -22,11 +54,13 @@ class Config:
         if config_path is None:
             config_path = Path(__file__).parent.parent / "config.yaml"
         
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        config_path = str(config_path)
+        self.config = _load_yaml(config_path, os.path.getmtime(config_path))
         
         # Validate required environment variables
         self._validate_env_vars()
+        
+        self._load_values()
     
     def _validate_env_vars(self):
         """Validate that all required environment variables are set"""
@@ -43,78 +77,71 @@ class Config:
                 f"Please set them in .env file or environment."
             )
     
-    # ========== Reddit Config ==========
-    
-    @property
-    def reddit_user_agent(self) -> str:
-        """User agent for Reddit API requests"""
-        return os.getenv('REDDIT_USER_AGENT', 'TOEFL_Scout/1.0')
-    
-    @property
-    def subreddits(self) -> List[str]:
-        """List of subreddits to monitor"""
-        return self.config.get('reddit', {}).get('subreddits', ['TOEFL', 'ToeflAdvice'])
-    
-    @property
-    def post_limit(self) -> int:
-        """Maximum number of posts to fetch per subreddit"""
-        return self.config.get('reddit', {}).get('post_limit', 50)
-    
-    @property
-    def time_filter(self) -> str:
-        """Time filter for top posts"""
-        return self.config.get('reddit', {}).get('time_filter', 'day')
-    
-    # ========== Gemini Config ==========
-    
-    @property
-    def gemini_api_key(self) -> str:
-        """Google Gemini API key"""
-        return os.getenv('GEMINI_API_KEY')
-    
-    @property
-    def gemini_model(self) -> str:
-        """Gemini model name"""
-        return self.config.get('gemini', {}).get('model', 'gemini-3-flash-preview')
-    
-    @property
-    def gemini_max_tokens(self) -> int:
-        """Maximum tokens for Gemini response"""
-        return self.config.get('gemini', {}).get('max_tokens', 2048)
-    
-    @property
-    def gemini_temperature(self) -> float:
-        """Temperature for Gemini generation"""
-        return self.config.get('gemini', {}).get('temperature', 0.3)
-    
-    # ========== Filter Config ==========
-    
-    @property
-    def min_upvotes(self) -> int:
-        """Minimum upvotes for posts"""
-        return self.config.get('filters', {}).get('min_upvotes', 5)
-    
-    @property
-    def min_comments(self) -> int:
-        """Minimum comments for posts"""
-        return self.config.get('filters', {}).get('min_comments', 2)
-    
-    @property
-    def min_comment_score(self) -> int:
-        """Minimum score for comments"""
-        return self.config.get('filters', {}).get('min_comment_score', 3)
-    
-    @property
-    def keywords(self) -> List[str]:
-        """Keywords to filter posts"""
-        return self.config.get('filters', {}).get('keywords', [])
-    
-    # ========== Database Config ==========
+    def _load_values(self):
+        """Materialize configuration values into plain attributes
+        
+        Values are read once here so that hot loops (e.g. per-post filters)
+        do a single attribute lookup instead of walking nested dicts.
+        """
+        reddit = self.config.get('reddit', {})
+        gemini = self.config.get('gemini', {})
+        filters = self.config.get('filters', {})
+        database = self.config.get('database', {})
+        output = self.config.get('output', {})
+        
+        # ========== Reddit Config ==========
+        
+        # User agent for Reddit API requests
+        self.reddit_user_agent: str = os.getenv('REDDIT_USER_AGENT', 'TOEFL_Scout/1.0')
+        # List of subreddits to monitor
+        self.subreddits: List[str] = reddit.get('subreddits', ['TOEFL', 'ToeflAdvice'])
+        # Maximum number of posts to fetch per subreddit
+        self.post_limit: int = reddit.get('post_limit', 50)
+        # Time filter for top posts
+        self.time_filter: str = reddit.get('time_filter', 'day')
+        
+        # ========== Gemini Config ==========
+        
+        # Google Gemini API key
+        self.gemini_api_key: str = os.getenv('GEMINI_API_KEY')
+        # Gemini model name
+        self.gemini_model: str = gemini.get('model', 'gemini-3-flash-preview')
+        # Maximum tokens for Gemini response
+        self.gemini_max_tokens: int = gemini.get('max_tokens', 2048)
+        # Temperature for Gemini generation
+        self.gemini_temperature: float = gemini.get('temperature', 0.3)
+        # Maximum number of concurrent Gemini requests
+        self.gemini_concurrency: int = gemini.get('concurrency', 8)
+        # Number of posts/comments analyzed per Gemini request
+        self.gemini_batch_size: int = gemini.get('batch_size', 5)
+        
+        # ========== Filter Config ==========
+        
+        # Minimum upvotes for posts
+        self.min_upvotes: int = filters.get('min_upvotes', 5)
+        # Minimum comments for posts
+        self.min_comments: int = filters.get('min_comments', 2)
+        # Minimum score for comments
+        self.min_comment_score: int = filters.get('min_comment_score', 3)
+        # Keywords to filter posts
+        self.keywords: List[str] = filters.get('keywords', [])
+        
+        # ========== Database Config ==========
+        
+        # TTL for pushed posts in days (default: 3)
+        self.ttl_days: int = database.get('ttl_days', 3)
+        
+        # ========== Discord Config ==========
+        
+        # Discord webhook URL
+        self.discord_webhook_url: str = os.getenv('DISCORD_WEBHOOK_URL')
+        
+        # ========== Output Config ==========
+        
+        # Number of top opportunities to return
+        self.top_n: int = output.get('top_n', 10)
     
-    @property
-    def ttl_days(self) -> int:
-        """TTL for pushed posts in days (default: 3)"""
-        return self.config.get('database', {}).get('ttl_days', 3)
+    # ========== Database Path ==========
     
     @property
     def database_path(self) -> str:
@@ -123,31 +150,33 @@ class Config:
         On Railway: uses /app/data (Volume mount point)
         Local: uses ./data relative to project
         """
+        return self._data_path('pushed_posts.db')
+    
+    @property
+    def response_cache_path(self) -> str:
+        """Path to the on-disk Reddit response cache (next to the database)"""
+        return self._data_path('reddit_cache.db')
+    
+    def _data_path(self, filename: str) -> str:
+        """Resolve a file in the persistent data directory
+        
+        Args:
+            filename: File name inside the data directory
+            
+        Returns:
+            Path to the file
+        """
         import os
         
         # Railway Volume mount point
         if os.path.exists('/app/data'):
-            db_path = Path('/app/data/pushed_posts.db')
+            path = Path('/app/data') / filename
         else:
             # Local development
-            db_path = Path(__file__).parent.parent / "data" / "pushed_posts.db"
-            db_path.parent.mkdir(parents=True, exist_ok=True)
+            path = Path(__file__).parent.parent / "data" / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
         
-        return str(db_path)
-    
-    # ========== Discord Config ==========
-    
-    @property
-    def discord_webhook_url(self) -> str:
-        """Discord webhook URL"""
-        return os.getenv('DISCORD_WEBHOOK_URL')
-    
-    # ========== Output Config ==========
-    
-    @property
-    def top_n(self) -> int:
-        """Number of top opportunities to return"""
-        return self.config.get('output', {}).get('top_n', 10)
+        return str(path)
     
     # ========== Utility ==========
     
@@ -2,14 +2,161 @@
 
 from google import genai
 from google.genai import types
-from typing import List, Dict, Any, Optional
-import json
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Awaitable, Literal, Tuple
+import asyncio
+import heapq
 import logging
-from datetime import datetime
+import time
+
+from .models import Comment, Post
 
 logger = logging.getLogger(__name__)
 
 
+# ========== Response Schemas ==========
+
+class ReplyCandidate(BaseModel):
+    """A single copy-paste ready reply draft"""
+    style: str = Field(description="Short name of the reply approach")
+    tone: str = Field(description="Tone of the reply, e.g. professional/casual/direct")
+    draft: str = Field(description="Full reply draft in English, ready to copy-paste")
+    why: str = Field(description="Why this approach works")
+
+
+class PostAnalysis(BaseModel):
+    """Gemini analysis result for a post"""
+    id: str = Field(description="ID of the analyzed post")
+    is_help_seeking: bool
+    topic: Literal['Reading', 'Listening', 'Speaking', 'Writing', 'General']
+    score: float = Field(description="Reply opportunity score from 1 to 10")
+    product_fit: Literal['high', 'medium', 'low']
+    reply_candidates: List[ReplyCandidate]
+    reason: str = Field(description="Brief explanation of score")
+
+
+class CommentAnalysis(BaseModel):
+    """Gemini analysis result for a comment"""
+    id: str = Field(description="ID of the analyzed comment")
+    is_valuable_comment: bool
+    opportunity_type: Literal['supplement', 'correct', 'alternative', 'disagree']
+    score: float = Field(description="Reply opportunity score from 1 to 10")
+    product_fit: Literal['high', 'medium', 'low']
+    reply_candidates: List[ReplyCandidate]
+    reason: str = Field(description="Brief explanation of score and opportunity")
+
+
+# Static rubric and scoring criteria shared by every request.
+# Sent as the system instruction so the prompt prefix is identical across
+# calls and Gemini can reuse it via implicit context caching; only the small
+# per-item fields travel in `contents`.
+POST_SYSTEM_PROMPT = """You analyze TOEFL-related Reddit posts for reply opportunities.
+
+Each request contains one or more posts. Analyze each post independently and
+return exactly one result per post, with `id` set to that post's ID.
+
+Your task (for each post):
+1. Determine if this is a genuine help-seeking post (not spam/meme/off-topic)
+2. Identify the TOEFL topic (Reading/Listening/Speaking/Writing/General)
+3. Evaluate reply opportunity value (1-10 score)
+4. Generate 2-3 reply candidates with different approaches
+   (e.g. Expert Mentor / Friendly Peer / Practical Helper): English drafts of
+   100-200 words, ready to copy-paste, mentioning TOEFLAIR naturally where appropriate
+
+Scoring criteria:
+- Post quality: Is it specific, clear, and detailed? (0-3 points)
+- Engagement potential: Good upvote/comment ratio? (0-2 points)
+- Recency: Fresh post = better visibility (0-2 points)
+- TOEFLAIR product fit: Can we naturally mention our product? (0-3 points)"""
+
+COMMENT_SYSTEM_PROMPT = """You analyze TOEFL-related Reddit comments for reply opportunities.
+
+Each request contains one or more comments. Analyze each comment independently and
+return exactly one result per comment, with `id` set to that comment's ID.
+
+Your task (for each comment):
+1. Evaluate the comment quality (is it helpful, accurate, complete?)
+2. Identify reply opportunities (gaps, misconceptions, additions)
+3. Score the opportunity value (1-10)
+4. Generate 2-3 reply candidates with different approaches
+   (e.g. Agree & Expand / Personal Experience / Resource Sharer): English drafts of
+   80-150 words, ready to copy-paste, referencing the original comment naturally
+   and mentioning TOEFLAIR where appropriate
+
+Scoring criteria:
+- Comment quality gap: Incomplete/inaccurate advice? (0-3 points)
+- Engagement: High upvotes = more visibility (0-2 points)
+- Recency: Fresh comment = better timing (0-2 points)
+- Value-add potential: Can we provide unique insights? (0-3 points)"""
+
+
+# Items whose cheap local pre-score falls below this cannot realistically
+# reach the 5.0 Gemini threshold, so they are not sent at all
+MIN_PRESCORE = 3.0
+
+# Age after which an item no longer earns any recency points
+RECENCY_WINDOW_HOURS = 48
+
+
+def _recency_factor(created_utc: float, now: float) -> float:
+    """Linear recency weight: 1.0 when just posted, 0.0 after RECENCY_WINDOW_HOURS"""
+    hours_ago = (now - created_utc) / 3600
+    return max(0.0, 1.0 - hours_ago / RECENCY_WINDOW_HOURS)
+
+
+def _prescore_post(post: Post, now: float) -> float:
+    """Cheap deterministic estimate of a post's reply opportunity (0-7)
+    
+    Args:
+        post: Post to score
+        now: Reference Unix time for computing post age
+        
+    Returns:
+        Sum of engagement, content length and recency contributions
+    """
+    return (
+        min(post.score / 20, 1.0) * 2
+        + min(post.num_comments / 10, 1.0) * 2
+        + (len(post.selftext) > 200)
+        + _recency_factor(post.created_utc, now) * 2
+    )
+
+
+def _prescore_comment(comment: Comment, now: float) -> float:
+    """Cheap deterministic estimate of a comment's reply opportunity (0-7)
+    
+    Args:
+        comment: Comment to score
+        now: Reference Unix time for computing comment age
+        
+    Returns:
+        Sum of engagement, content length, visibility and recency contributions
+    """
+    return (
+        min(comment.score / 20, 1.0) * 2
+        + min(len(comment.body) / 300, 1.0) * 2
+        + (comment.depth <= 1)
+        + _recency_factor(comment.created_utc, now) * 2
+    )
+
+
+async def _gather_bounded(coros: List[Awaitable], semaphore: asyncio.Semaphore) -> List[Any]:
+    """Run coroutines concurrently, limited by a (possibly shared) semaphore
+    
+    Args:
+        coros: Coroutines to run
+        semaphore: Semaphore bounding the number of coroutines in flight
+        
+    Returns:
+        Results in input order (exceptions are returned, not raised)
+    """
+    async def _bounded(coro: Awaitable) -> Any:
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(_bounded(c) for c in coros), return_exceptions=True)
+
+
 class ContentAnalyzer:
     """Analyzer for Reddit posts and comments using Gemini"""
     
@@ -17,7 +164,9 @@ class ContentAnalyzer:
         self, 
         api_key: str,
         model: str = 'gemini-3-flash-preview',
-        temperature: float = 1.0
+        temperature: float = 1.0,
+        concurrency: int = 8,
+        batch_size: int = 5
     ):
         """Initialize Gemini API
         
@@ -25,263 +174,335 @@ class ContentAnalyzer:
             api_key: Google Gemini API key
             model: Model name
             temperature: Generation temperature (default 1.0 recommended for Gemini 3)
+            concurrency: Maximum number of concurrent Gemini requests
+            batch_size: Number of posts/comments analyzed per Gemini request
         """
+        # The client keeps a pooled HTTP connection for its whole lifetime;
+        # a single event loop per analyzer lets those keep-alive connections
+        # be reused across batches instead of being bound to a closed loop
         self.client = genai.Client(api_key=api_key)
+        self._loop = asyncio.new_event_loop()
         self.model_name = model
         self.temperature = temperature
+        self.concurrency = concurrency
+        self.batch_size = batch_size
         
         logger.info(f"Gemini API initialized with model {model}")
     
+    def close(self):
+        """Close the Gemini client connections and the event loop"""
+        self._loop.run_until_complete(self.client.aio.aclose())
+        self.client.close()
+        self._loop.close()
+    
+    # ========== Combined Analysis ==========
+    
+    def analyze_all(
+        self, 
+        posts: List[Post], 
+        comments: List[Comment]
+    ) -> Tuple[List[Post], List[Comment]]:
+        """Analyze posts and comments concurrently
+        
+        Both batches share one concurrency limit, so comment requests start
+        as soon as slots free up instead of waiting for the slowest post.
+        
+        Args:
+            posts: List of posts
+            comments: List of comments
+            
+        Returns:
+            Tuple of (analyzed posts, analyzed comments)
+        """
+        async def _analyze_both():
+            semaphore = asyncio.Semaphore(self.concurrency)
+            return await asyncio.gather(
+                self._analyze_posts_async(posts, semaphore),
+                self._analyze_comments_async(comments, semaphore)
+            )
+        
+        analyzed_posts, analyzed_comments = self._loop.run_until_complete(_analyze_both())
+        return analyzed_posts, analyzed_comments
+    
     # ========== Post Analysis ==========
     
-    def analyze_posts_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def analyze_posts_batch(self, posts: List[Post]) -> List[Post]:
         """Analyze a batch of posts
         
         Args:
-            posts: List of post dictionaries
+            posts: List of posts
+            
+        Returns:
+            Posts that scored >= 5.0, with `analysis` set
+        """
+        return self._loop.run_until_complete(self._analyze_posts_async(posts))
+    
+    async def _analyze_posts_async(
+        self, 
+        posts: List[Post],
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[Post]:
+        """Analyze a batch of posts on the analyzer's event loop
+        
+        Args:
+            posts: List of posts
+            semaphore: Limit on in-flight Gemini requests (shared when analyzing
+                posts and comments together; created from `concurrency` if None)
             
         Returns:
-            List of analyzed posts with scores and suggestions
+            Posts that scored >= 5.0, with `analysis` set
         """
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency)
+        
         analyzed_posts = []
         
-        for post in posts:
-            try:
-                analysis = self._analyze_single_post(post)
+        # One timestamp for the whole batch keeps prompts deterministic
+        now = time.time()
+        
+        # Skip obvious rejects locally instead of paying a Gemini round-trip
+        candidates = [p for p in posts if _prescore_post(p, now) >= MIN_PRESCORE]
+        skipped = len(posts) - len(candidates)
+        if skipped > 0:
+            logger.info(f"Skipped {skipped} low-potential posts before analysis")
+        
+        # Several posts per request amortize the per-call overhead, and the
+        # network-bound requests themselves are dispatched concurrently
+        chunks = [
+            candidates[i:i + self.batch_size] 
+            for i in range(0, len(candidates), self.batch_size)
+        ]
+        tasks = [self._analyze_posts_chunk_async(chunk, now) for chunk in chunks]
+        results = await _gather_bounded(tasks, semaphore)
+        
+        for chunk, analyses in zip(chunks, results):
+            if isinstance(analyses, Exception):
+                logger.error(f"Error analyzing posts {[p.id for p in chunk]}: {analyses}")
+                continue
+            
+            for post in chunk:
+                analysis = analyses.get(post.id)
                 
                 if analysis and analysis.get('score', 0) >= 5.0:
-                    post_with_analysis = {**post, **analysis}
-                    analyzed_posts.append(post_with_analysis)
-                    logger.debug(f"Post {post['id']} scored {analysis.get('score', 0)}")
-                    
-            except Exception as e:
-                logger.error(f"Error analyzing post {post['id']}: {e}")
+                    post.analysis = analysis
+                    analyzed_posts.append(post)
+                    logger.debug(f"Post {post.id} scored {analysis.get('score', 0)}")
         
         logger.info(f"Analyzed {len(analyzed_posts)}/{len(posts)} posts successfully")
         return analyzed_posts
     
-    def _analyze_single_post(self, post: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Analyze a single post
+    async def _analyze_posts_chunk_async(
+        self, 
+        posts: List[Post],
+        now: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """Analyze a chunk of posts in a single Gemini request
         
         Args:
-            post: Post dictionary
+            posts: List of posts
+            now: Reference Unix time for computing post age
             
         Returns:
-            Analysis dictionary with score and suggestions
+            Analysis dictionaries keyed by post ID
         """
-        prompt = self._build_post_analysis_prompt(post)
+        prompt = self._build_posts_chunk_prompt(posts, now)
         
         try:
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=self.model_name,
                 contents=prompt,
                 config=types.GenerateContentConfig(
+                    system_instruction=POST_SYSTEM_PROMPT,
                     temperature=self.temperature,
                     thinking_config=types.ThinkingConfig(thinking_level="low"),
+                    response_mime_type="application/json",
+                    response_schema=list[PostAnalysis],
                 ),
             )
-            result = self._parse_analysis_response(response.text)
-            return result
+            return self._parse_analysis_response(response)
             
         except Exception as e:
-            logger.error(f"Gemini API error for post {post['id']}: {e}")
-            return None
+            logger.error(f"Gemini API error for posts {[p.id for p in posts]}: {e}")
+            return {}
     
-    def _build_post_analysis_prompt(self, post: Dict[str, Any]) -> str:
-        """Build prompt for post analysis
+    def _build_posts_chunk_prompt(self, posts: List[Post], now: float) -> str:
+        """Build prompt for a chunk of posts (rubric lives in POST_SYSTEM_PROMPT)
         
         Args:
-            post: Post dictionary
+            posts: List of posts
+            now: Reference Unix time for computing post age
             
         Returns:
             Prompt string
         """
+        blocks = [self._build_post_analysis_prompt(post, now) for post in posts]
+        
+        prompt = f"Analyze each of these {len(posts)} TOEFL-related Reddit posts for reply opportunity:\n\n"
+        prompt += "\n\n---\n\n".join(blocks)
+        
+        return prompt
+    
+    def _build_post_analysis_prompt(self, post: Post, now: float) -> str:
+        """Build prompt block for a single post
+        
+        Args:
+            post: Post
+            now: Reference Unix time for computing post age
+            
+        Returns:
+            Prompt block string
+        """
         # Calculate time since posted
-        time_since = datetime.now() - post['created_utc']
-        hours_ago = time_since.total_seconds() / 3600
+        hours_ago = (now - post.created_utc) / 3600
         
-        prompt = f"""Analyze this TOEFL-related Reddit post for reply opportunity:
-
-**Post Title:** {post['title']}
-**Subreddit:** r/{post['subreddit']}
-**Content:** {post['selftext'][:500]}
-**Upvotes:** {post['score']}
-**Comments:** {post['num_comments']}
-**Posted:** {hours_ago:.1f} hours ago
-
-Your task:
-1. Determine if this is a genuine help-seeking post (not spam/meme/off-topic)
-2. Identify the TOEFL topic (Reading/Listening/Speaking/Writing/General)
-3. Evaluate reply opportunity value (1-10 score)
-4. Generate 2-3 reply candidates with different approaches
-
-Scoring criteria:
-- Post quality: Is it specific, clear, and detailed? (0-3 points)
-- Engagement potential: Good upvote/comment ratio? (0-2 points)
-- Recency: Fresh post = better visibility (0-2 points)
-- TOEFLAIR product fit: Can we naturally mention our product? (0-3 points)
-
-Return ONLY valid JSON in this exact format:
-{{
-  "is_help_seeking": true/false,
-  "topic": "Reading/Listening/Speaking/Writing/General",
-  "score": 8.5,
-  "product_fit": "high/medium/low",
-  "reply_candidates": [
-    {{
-      "style": "Expert Mentor",
-      "tone": "professional",
-      "draft": "Full reply draft in English (100-200 words, ready to copy-paste)",
-      "why": "Shows expertise, builds credibility"
-    }},
-    {{
-      "style": "Friendly Peer", 
-      "tone": "casual",
-      "draft": "Full reply draft in English (100-200 words, ready to copy-paste)",
-      "why": "Relatable, builds rapport"
-    }},
-    {{
-      "style": "Practical Helper",
-      "tone": "direct",
-      "draft": "Full reply draft in English (100-200 words, ready to copy-paste)",
-      "why": "Straight to the point, saves time"
-    }}
-  ],
-  "reason": "brief explanation of score"
-}}
-
-Important: 
-- ALL output must be in English (Reddit audience)
-- Each draft should be ready to copy-paste
-- Naturally mention TOEFLAIR where appropriate
-- Keep drafts 100-200 words each"""
+        prompt = f"""**Post ID:** {post.id}
+**Post Title:** {post.title}
+**Subreddit:** r/{post.subreddit}
+**Content:** {post.selftext_preview}
+**Upvotes:** {post.score}
+**Comments:** {post.num_comments}
+**Posted:** {hours_ago:.1f} hours ago"""
         
         return prompt
     
     # ========== Comment Analysis ==========
     
-    def analyze_comments_batch(self, comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def analyze_comments_batch(self, comments: List[Comment]) -> List[Comment]:
         """Analyze a batch of comments
         
         Args:
-            comments: List of comment dictionaries
+            comments: List of comments
+            
+        Returns:
+            Comments that scored >= 5.0, with `analysis` set
+        """
+        return self._loop.run_until_complete(self._analyze_comments_async(comments))
+    
+    async def _analyze_comments_async(
+        self, 
+        comments: List[Comment],
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[Comment]:
+        """Analyze a batch of comments on the analyzer's event loop
+        
+        Args:
+            comments: List of comments
+            semaphore: Limit on in-flight Gemini requests (shared when analyzing
+                posts and comments together; created from `concurrency` if None)
             
         Returns:
-            List of analyzed comments with scores and suggestions
+            Comments that scored >= 5.0, with `analysis` set
         """
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency)
+        
         analyzed_comments = []
         
-        for comment in comments:
-            try:
-                analysis = self._analyze_single_comment(comment)
+        # One timestamp for the whole batch keeps prompts deterministic
+        now = time.time()
+        
+        # Skip obvious rejects locally instead of paying a Gemini round-trip
+        candidates = [c for c in comments if _prescore_comment(c, now) >= MIN_PRESCORE]
+        skipped = len(comments) - len(candidates)
+        if skipped > 0:
+            logger.info(f"Skipped {skipped} low-potential comments before analysis")
+        
+        # Several comments per request amortize the per-call overhead, and the
+        # network-bound requests themselves are dispatched concurrently
+        chunks = [
+            candidates[i:i + self.batch_size] 
+            for i in range(0, len(candidates), self.batch_size)
+        ]
+        tasks = [self._analyze_comments_chunk_async(chunk, now) for chunk in chunks]
+        results = await _gather_bounded(tasks, semaphore)
+        
+        for chunk, analyses in zip(chunks, results):
+            if isinstance(analyses, Exception):
+                logger.error(f"Error analyzing comments {[c.id for c in chunk]}: {analyses}")
+                continue
+            
+            for comment in chunk:
+                analysis = analyses.get(comment.id)
                 
                 if analysis and analysis.get('score', 0) >= 5.0:
-                    comment_with_analysis = {**comment, **analysis}
-                    analyzed_comments.append(comment_with_analysis)
-                    logger.debug(f"Comment {comment['id']} scored {analysis.get('score', 0)}")
-                    
-            except Exception as e:
-                logger.error(f"Error analyzing comment {comment['id']}: {e}")
+                    comment.analysis = analysis
+                    analyzed_comments.append(comment)
+                    logger.debug(f"Comment {comment.id} scored {analysis.get('score', 0)}")
         
         logger.info(f"Analyzed {len(analyzed_comments)}/{len(comments)} comments successfully")
         return analyzed_comments
     
-    def _analyze_single_comment(self, comment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Analyze a single comment
+    async def _analyze_comments_chunk_async(
+        self, 
+        comments: List[Comment],
+        now: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """Analyze a chunk of comments in a single Gemini request
         
         Args:
-            comment: Comment dictionary
+            comments: List of comments
+            now: Reference Unix time for computing comment age
             
         Returns:
-            Analysis dictionary with score and suggestions
+            Analysis dictionaries keyed by comment ID
         """
-        prompt = self._build_comment_analysis_prompt(comment)
+        prompt = self._build_comments_chunk_prompt(comments, now)
         
         try:
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=self.model_name,
                 contents=prompt,
                 config=types.GenerateContentConfig(
+                    system_instruction=COMMENT_SYSTEM_PROMPT,
                     temperature=self.temperature,
                     thinking_config=types.ThinkingConfig(thinking_level="low"),
+                    response_mime_type="application/json",
+                    response_schema=list[CommentAnalysis],
                 ),
             )
-            result = self._parse_analysis_response(response.text)
-            return result
+            return self._parse_analysis_response(response)
             
         except Exception as e:
-            logger.error(f"Gemini API error for comment {comment['id']}: {e}")
-            return None
+            logger.error(f"Gemini API error for comments {[c.id for c in comments]}: {e}")
+            return {}
     
-    def _build_comment_analysis_prompt(self, comment: Dict[str, Any]) -> str:
-        """Build prompt for comment analysis
+    def _build_comments_chunk_prompt(self, comments: List[Comment], now: float) -> str:
+        """Build prompt for a chunk of comments (rubric lives in COMMENT_SYSTEM_PROMPT)
         
         Args:
-            comment: Comment dictionary
+            comments: List of comments
+            now: Reference Unix time for computing comment age
             
         Returns:
             Prompt string
         """
+        blocks = [self._build_comment_analysis_prompt(comment, now) for comment in comments]
+        
+        prompt = f"Analyze each of these {len(comments)} TOEFL-related Reddit comments for reply opportunity:\n\n"
+        prompt += "\n\n---\n\n".join(blocks)
+        
+        return prompt
+    
+    def _build_comment_analysis_prompt(self, comment: Comment, now: float) -> str:
+        """Build prompt block for a single comment
+        
+        Args:
+            comment: Comment
+            now: Reference Unix time for computing comment age
+            
+        Returns:
+            Prompt block string
+        """
         # Calculate time since posted
-        time_since = datetime.now() - comment['created_utc']
-        hours_ago = time_since.total_seconds() / 3600
+        hours_ago = (now - comment.created_utc) / 3600
         
-        prompt = f"""Analyze this TOEFL-related Reddit comment for reply opportunity:
-
-**Original Post:** {comment['post_title']}
-**Comment by:** u/{comment['author']}
-**Comment:** {comment['body'][:500]}
-**Upvotes:** {comment['score']}
-**Depth:** {comment['depth']} (0 = top-level)
-**Posted:** {hours_ago:.1f} hours ago
-
-Your task:
-1. Evaluate the comment quality (is it helpful, accurate, complete?)
-2. Identify reply opportunities (gaps, misconceptions, additions)
-3. Score the opportunity value (1-10)
-4. Generate 2-3 reply candidates with different approaches
-
-Scoring criteria:
-- Comment quality gap: Incomplete/inaccurate advice? (0-3 points)
-- Engagement: High upvotes = more visibility (0-2 points)
-- Recency: Fresh comment = better timing (0-2 points)
-- Value-add potential: Can we provide unique insights? (0-3 points)
-
-Return ONLY valid JSON in this exact format:
-{{
-  "is_valuable_comment": true/false,
-  "opportunity_type": "supplement/correct/alternative/disagree",
-  "score": 7.8,
-  "product_fit": "high/medium/low",
-  "reply_candidates": [
-    {{
-      "style": "Agree & Expand",
-      "tone": "agreeable",
-      "draft": "Full reply draft in English (80-150 words, ready to copy-paste)",
-      "why": "Non-confrontational, adds value without stepping on toes"
-    }},
-    {{
-      "style": "Personal Experience",
-      "tone": "personal",
-      "draft": "Full reply draft in English (80-150 words, ready to copy-paste)",
-      "why": "Builds credibility through personal story"
-    }},
-    {{
-      "style": "Resource Sharer",
-      "tone": "helpful",
-      "draft": "Full reply draft in English (80-150 words, ready to copy-paste)",
-      "why": "Provides immediate practical value"
-    }}
-  ],
-  "reason": "brief explanation of score and opportunity"
-}}
-
-Important:
-- ALL output must be in English (Reddit audience)
-- Each draft should be ready to copy-paste
-- Reference the original comment naturally
-- Mention TOEFLAIR where appropriate
-- Keep drafts 80-150 words each"""
+        prompt = f"""**Comment ID:** {comment.id}
+**Original Post:** {comment.post_title}
+**Comment by:** u/{comment.author}
+**Comment:** {comment.body[:500]}
+**Upvotes:** {comment.score}
+**Depth:** {comment.depth} (0 = top-level)
+**Posted:** {hours_ago:.1f} hours ago"""
         
         return prompt
     
@@ -289,67 +510,73 @@ Important:
     
     def rank_post_opportunities(
         self, 
-        analyzed_posts: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Rank posts by opportunity score
+        analyzed_posts: List[Post],
+        top_n: int = 10
+    ) -> List[Post]:
+        """Select the top N posts by opportunity score
         
         Args:
             analyzed_posts: List of analyzed posts
+            top_n: Number of posts to return
             
         Returns:
-            Sorted list of posts (highest score first)
+            Top N posts (highest score first)
         """
-        return sorted(
+        return heapq.nlargest(
+            top_n,
             analyzed_posts,
-            key=lambda x: x.get('score', 0),
-            reverse=True
+            key=lambda x: x.analysis.get('score', 0)
         )
     
     def rank_comment_opportunities(
         self, 
-        analyzed_comments: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Rank comments by opportunity score
+        analyzed_comments: List[Comment],
+        top_n: int = 10
+    ) -> List[Comment]:
+        """Select the top N comments by opportunity score
         
         Args:
             analyzed_comments: List of analyzed comments
+            top_n: Number of comments to return
             
         Returns:
-            Sorted list of comments (highest score first)
+            Top N comments (highest score first)
         """
-        return sorted(
+        return heapq.nlargest(
+            top_n,
             analyzed_comments,
-            key=lambda x: x.get('score', 0),
-            reverse=True
+            key=lambda x: x.analysis.get('score', 0)
         )
     
     # ========== Helper Methods ==========
     
-    def _parse_analysis_response(self, response_text: str) -> Optional[Dict[str, Any]]:
-        """Parse Gemini response into structured data
+    def _parse_analysis_response(
+        self, 
+        response: types.GenerateContentResponse
+    ) -> Dict[str, Dict[str, Any]]:
+        """Convert Gemini structured output into plain dictionaries
         
         Args:
-            response_text: Raw response from Gemini
+            response: Gemini response generated with a list response_schema
             
         Returns:
-            Parsed dictionary or None if parsing fails
+            Analysis dictionaries keyed by item ID (empty if the response
+            did not match the schema)
         """
-        try:
-            # Extract JSON from markdown code blocks if present
-            if '```json' in response_text:
-                start = response_text.find('```json') + 7
-                end = response_text.find('```', start)
-                response_text = response_text[start:end].strip()
-            elif '```' in response_text:
-                start = response_text.find('```') + 3
-                end = response_text.find('```', start)
-                response_text = response_text[start:end].strip()
-            
-            # Parse JSON
-            result = json.loads(response_text)
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            logger.debug(f"Response text: {response_text}")
-            return None
+        usage = response.usage_metadata
+        if usage is not None:
+            logger.debug(
+                f"Gemini usage: prompt={usage.prompt_token_count}, "
+                f"cached={usage.cached_content_token_count or 0}, "
+                f"output={usage.candidates_token_count}"
+            )
+        
+        if response.parsed is None:
+            logger.error("Gemini response did not match the expected schema")
+            logger.debug(f"Response text: {response.text}")
+            return {}
+        
+        return {
+            analysis.id: analysis.model_dump(exclude={'id'}) 
+            for analysis in response.parsed
+        }
@@ -2,12 +2,45 @@
 
 import sqlite3
 from datetime import datetime, timedelta
-from typing import Set
+from typing import Optional, Set
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Stay below SQLite's default 999 bound-parameter limit
+MAX_QUERY_PARAMS = 900
+
+# PRAGMA auto_vacuum value for INCREMENTAL mode
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Max free pages reclaimed per cleanup run
+INCREMENTAL_VACUUM_PAGES = 1000
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection):
+    """Switch a database file to incremental auto-vacuum
+    
+    Must run before WAL is enabled and before the first table is created.
+    Fresh databases pick up the mode immediately. Existing databases
+    need a one-time VACUUM to rebuild the file with the new mode.
+    
+    Args:
+        conn: Open SQLite connection (autocommit mode)
+    """
+    cursor = conn.cursor()
+    
+    cursor.execute('PRAGMA auto_vacuum')
+    if cursor.fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return
+    
+    cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    
+    cursor.execute('SELECT 1 FROM sqlite_master LIMIT 1')
+    if cursor.fetchone() is not None:
+        cursor.execute('VACUUM')
+        logger.info("Migrated database to incremental auto-vacuum")
+
 
 class Database:
     """Lightweight SQLite database for tracking pushed posts
@@ -27,13 +60,33 @@ class Database:
         # Ensure directory exists
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
+        # In-memory copy of pushed IDs, loaded lazily by get_pushed_ids()
+        self._pushed_cache: Optional[Set[str]] = None
+        
+        # Single connection for the whole run (autocommit mode)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        
         # Initialize database
         self._init_db()
     
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+        logger.debug(f"Database connection closed ({self.db_path})")
+    
     def _init_db(self):
-        """Create table if it doesn't exist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Configure the connection and create table if it doesn't exist"""
+        # Must run before WAL is enabled and before the first table is created
+        enable_incremental_vacuum(self.conn)
+        
+        self.conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-20000;
+        ''')
+        
+        cursor = self.conn.cursor()
         
         # Simple table: just post_id and pushed_at
         cursor.execute('''
@@ -49,9 +102,6 @@ class Database:
             ON pushed_posts(pushed_at)
         ''')
         
-        conn.commit()
-        conn.close()
-        
         logger.info(f"Database initialized at {self.db_path}")
     
     def was_pushed(self, post_id: str) -> bool:
@@ -63,18 +113,17 @@ class Database:
         Returns:
             True if post was already pushed
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if self._pushed_cache is not None:
+            return post_id in self._pushed_cache
+        
+        cursor = self.conn.cursor()
         
         cursor.execute(
-            'SELECT 1 FROM pushed_posts WHERE post_id = ?',
+            'SELECT EXISTS(SELECT 1 FROM pushed_posts WHERE post_id = ? LIMIT 1)',
             (post_id,)
         )
         
-        result = cursor.fetchone() is not None
-        conn.close()
-        
-        return result
+        return cursor.fetchone()[0] == 1
     
     def mark_as_pushed(self, post_id: str):
         """Mark a post as pushed to Discord
@@ -82,16 +131,16 @@ class Database:
         Args:
             post_id: Reddit post ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         
         cursor.execute('''
-            INSERT OR REPLACE INTO pushed_posts (post_id, pushed_at)
+            INSERT INTO pushed_posts (post_id, pushed_at)
             VALUES (?, ?)
+            ON CONFLICT(post_id) DO UPDATE SET pushed_at = excluded.pushed_at
         ''', (post_id, datetime.now()))
         
-        conn.commit()
-        conn.close()
+        if self._pushed_cache is not None:
+            self._pushed_cache.add(post_id)
         
         logger.debug(f"Marked post {post_id} as pushed")
     
@@ -99,54 +148,78 @@ class Database:
         """Mark multiple posts as pushed
         
         Args:
-            posts: List of post dictionaries (must have 'id' key)
+            posts: List of posts
         """
         if not posts:
             return
             
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         
         now = datetime.now()
-        data = [(post['id'], now) for post in posts]
-        
-        cursor.executemany('''
-            INSERT OR REPLACE INTO pushed_posts (post_id, pushed_at)
-            VALUES (?, ?)
-        ''', data)
-        
-        conn.commit()
-        conn.close()
+        data = ((post.id, now) for post in posts)
+        
+        # One explicit transaction for the whole batch (connection is in autocommit mode)
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.executemany('''
+                INSERT INTO pushed_posts (post_id, pushed_at)
+                VALUES (?, ?)
+                ON CONFLICT(post_id) DO UPDATE SET pushed_at = excluded.pushed_at
+            ''', data)
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
+        
+        if self._pushed_cache is not None:
+            self._pushed_cache.update(post.id for post in posts)
         
         logger.info(f"Marked {len(posts)} posts as pushed")
     
     def get_pushed_ids(self) -> Set[str]:
         """Get all pushed post IDs
         
+        The result is cached for the rest of the run and kept in sync by
+        the mark_* methods; callers must not modify it.
+        
         Returns:
             Set of post IDs
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT post_id FROM pushed_posts')
-        
-        ids = {row[0] for row in cursor.fetchall()}
-        conn.close()
+        if self._pushed_cache is None:
+            cursor = self.conn.cursor()
+            
+            cursor.execute('SELECT post_id FROM pushed_posts')
+            
+            self._pushed_cache = {row[0] for row in cursor.fetchall()}
         
-        return ids
+        return self._pushed_cache
     
     def filter_new_posts(self, posts: list) -> list:
         """Filter out posts that have already been pushed
         
         Args:
-            posts: List of post dictionaries
+            posts: List of posts
             
         Returns:
             List of posts not yet pushed
         """
-        pushed_ids = self.get_pushed_ids()
-        new_posts = [p for p in posts if p['id'] not in pushed_ids]
+        if self._pushed_cache is not None:
+            pushed_ids = self._pushed_cache
+        else:
+            ids = [p.id for p in posts]
+            pushed_ids = set()
+            
+            # Only look up the fetched IDs (PRIMARY KEY index) instead of loading the whole table
+            for i in range(0, len(ids), MAX_QUERY_PARAMS):
+                chunk = ids[i:i + MAX_QUERY_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f'SELECT post_id FROM pushed_posts WHERE post_id IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                pushed_ids.update(row[0] for row in rows)
+        
+        new_posts = [p for p in posts if p.id not in pushed_ids]
         
         filtered = len(posts) - len(new_posts)
         if filtered > 0:
@@ -163,8 +236,7 @@ class Database:
         Returns:
             Number of deleted records
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         
         cutoff_date = datetime.now() - timedelta(days=days)
         
@@ -174,30 +246,35 @@ class Database:
         )
         
         deleted = cursor.rowcount
-        conn.commit()
-        
-        # Vacuum to reclaim space
-        cursor.execute('VACUUM')
-        
-        conn.close()
         
         if deleted > 0:
+            self._pushed_cache = None
+            
+            # Reclaim free pages in small steps instead of rewriting the whole file
+            # (executescript steps the pragma to completion)
+            self.conn.executescript(f'PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES});')
+            
             logger.info(f"Cleaned up {deleted} old records (older than {days} days)")
         
         return deleted
     
+    def ping(self) -> bool:
+        """Check that the connection is usable (cheapest possible query)
+        
+        Returns:
+            True if the database answered
+        """
+        return self.conn.execute('SELECT 1').fetchone() == (1,)
+    
     def get_stats(self) -> dict:
         """Get database statistics
         
         Returns:
             Dictionary with stats
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM pushed_posts')
         total = cursor.fetchone()[0]
         
-        conn.close()
-        
         return {'total': total}
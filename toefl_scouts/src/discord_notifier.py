@@ -1,12 +1,79 @@
 """Discord notification module for sending daily reports"""
 
 import requests
-from typing import List, Dict, Any
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from typing import List, Optional
+from urllib3.util.retry import Retry
 from datetime import datetime
+import json
 import logging
+import time
+
+from .models import Comment, Post
+
+# Prefer orjson for serializing webhook payloads when available
+try:
+    from orjson import dumps as _json_dumps
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
 
 logger = logging.getLogger(__name__)
 
+# Webhook POSTs are not idempotent: only a rate-limit rejection (429, which
+# honors Retry-After) is known not to have posted the message, so 5xx and
+# read timeouts are not retried to avoid duplicate report chunks
+RETRY_STATUS_CODES = (429,)
+
+# Report layout (built once at import; the header takes the report date)
+REPORT_HEADER = """━━━━━━━━━━━━━━━━━━━━━━━
+📊 **TOEFL Reddit Daily Report**
+📅 {date}
+━━━━━━━━━━━━━━━━━━━━━━━
+
+"""
+
+POSTS_BANNER = """═══════════════════════
+📌 **TOP Posts**
+═══════════════════════
+
+"""
+
+COMMENTS_BANNER = """═══════════════════════
+💬 **TOP Comments**
+═══════════════════════
+
+"""
+
+ITEM_SEPARATOR = "\n---\n\n"
+
+REPORT_FOOTER = "━━━━━━━━━━━━━━━━━━━━━━━\n✨ Good luck with your outreach!"
+
+# Product fit emoji
+FIT_EMOJI = {
+    'high': '🎯',
+    'medium': '🔸',
+    'low': '◽'
+}
+
+# Opportunity type emoji & label
+OPPORTUNITY_TYPE_INFO = {
+    'supplement': ('➕', 'Add Value'),
+    'correct': ('✏️', 'Correct Info'),
+    'alternative': ('🔄', 'Offer Alternative'),
+    'disagree': ('💭', 'Politely Disagree')
+}
+
+
+@lru_cache(maxsize=512)
+def _fmt_ago(count: int, unit: str) -> str:
+    """Render a time-ago bucket, e.g. (3, 'hour') -> "3 hours ago"
+    
+    Memoized: items in a report cluster into the same few buckets.
+    """
+    return f"{count} {unit}{'s' if count != 1 else ''} ago"
+
 
 class DiscordNotifier:
     """Send notifications to Discord via webhook"""
@@ -18,12 +85,34 @@ class DiscordNotifier:
             webhook_url: Discord webhook URL
         """
         self.webhook_url = webhook_url
+        
+        # One keep-alive connection for all chunks of a report, so the
+        # TCP/TLS handshake is paid once instead of per message
+        retries = Retry(
+            total=3,
+            connect=3,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({'POST'}),
+            respect_retry_after_header=True
+        )
+        self._session = requests.Session()
+        self._session.mount(
+            'https://', 
+            HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retries)
+        )
+        
         logger.info("Discord notifier initialized")
     
+    def close(self):
+        """Close the webhook HTTP session"""
+        self._session.close()
+    
     def send_daily_report(
         self, 
-        top_posts: List[Dict[str, Any]], 
-        top_comments: List[Dict[str, Any]]
+        top_posts: List[Post], 
+        top_comments: List[Comment]
     ):
         """Send daily report with top posts and comments
         
@@ -47,8 +136,8 @@ class DiscordNotifier:
     
     def _build_report_message(
         self, 
-        posts: List[Dict[str, Any]], 
-        comments: List[Dict[str, Any]]
+        posts: List[Post], 
+        comments: List[Comment]
     ) -> str:
         """Build formatted report message
         
@@ -59,75 +148,67 @@ class DiscordNotifier:
         Returns:
             Formatted message string
         """
-        date_str = datetime.now().strftime('%Y-%m-%d')
+        # One clock read for the whole report
+        now = time.time()
+        date_str = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
         
-        message = f"""━━━━━━━━━━━━━━━━━━━━━━━
-📊 **TOEFL Reddit Daily Report**
-📅 {date_str}
-━━━━━━━━━━━━━━━━━━━━━━━
-
-"""
+        # Collect fragments and join once instead of re-copying the growing string
+        parts = []
+        append = parts.append
+        
+        append(REPORT_HEADER.format(date=date_str))
         
         # Add posts section
         if posts:
-            message += """═══════════════════════
-📌 **TOP Posts**
-═══════════════════════
-
-"""
+            append(POSTS_BANNER)
             for i, post in enumerate(posts[:10], 1):
-                message += self._format_post(post, i)
-                message += "\n---\n\n"
+                append(self._format_post(post, i, now))
+                append(ITEM_SEPARATOR)
         
         # Add comments section
         if comments:
-            message += """═══════════════════════
-💬 **TOP Comments**
-═══════════════════════
-
-"""
+            append(COMMENTS_BANNER)
             for i, comment in enumerate(comments[:10], 1):
-                message += self._format_comment(comment, i)
-                message += "\n---\n\n"
+                append(self._format_comment(comment, i, now))
+                append(ITEM_SEPARATOR)
         
-        message += "━━━━━━━━━━━━━━━━━━━━━━━\n"
-        message += "✨ Good luck with your outreach!"
+        append(REPORT_FOOTER)
         
-        return message
+        return "".join(parts)
     
-    def _format_post(self, post: Dict[str, Any], rank: int) -> str:
+    def _format_post(self, post: Post, rank: int, now: float) -> str:
         """Format a single post
         
         Args:
-            post: Post dictionary with analysis
+            post: Analyzed post
             rank: Rank number
+            now: Reference Unix time for the time-ago label
             
         Returns:
             Formatted string
         """
-        score = post.get('score', 0)
-        product_fit = post.get('product_fit', 'medium')
-        reply_candidates = post.get('reply_candidates', [])
-        
-        # Product fit emoji
-        fit_emoji = {
-            'high': '🎯',
-            'medium': '🔸',
-            'low': '◽'
-        }.get(product_fit, '🔸')
-        
-        message = f"""**【#{rank}】⭐ Score: {score:.1f}/10**
-📝 **{post['title']}**
-🏷️ Topic: {post.get('topic', 'General')}
-🔥 Engagement: {post['score']}↑, {post['num_comments']}💬
-⏰ Posted: {self._format_time_ago(post['created_utc'])}
+        analysis = post.analysis or {}
+        score = analysis.get('score', 0)
+        product_fit = analysis.get('product_fit', 'medium')
+        reply_candidates = analysis.get('reply_candidates', [])
+        
+        fit_emoji = FIT_EMOJI.get(product_fit, '🔸')
+        
+        parts = []
+        append = parts.append
+        
+        append(f"""**【#{rank}】⭐ Score: {score:.1f}/10**
+📝 **{post.title}**
+🏷️ Topic: {analysis.get('topic', 'General')}
+🔥 Engagement: {post.score}↑, {post.num_comments}💬
+⏰ Posted: {self._format_time_ago(post.created_utc, now)}
 {fit_emoji} Product Fit: {product_fit}
 
-"""
+""")
         
         # Add reply candidates
         if reply_candidates:
-            message += "📋 **Reply Candidates (Copy & Paste Ready):**\n\n"
+            append("📋 **Reply Candidates (Copy & Paste Ready):**\n\n")
             
             for i, candidate in enumerate(reply_candidates, 1):
                 style = candidate.get('style', f'Option {i}')
@@ -135,65 +216,60 @@ class DiscordNotifier:
                 draft = candidate.get('draft', '')
                 why = candidate.get('why', '')
                 
-                message += f"**【{i}】{style}** ({tone})\n"
-                message += f"💭 *Why this: {why}*\n"
-                message += f"```\n{draft}\n```\n\n"
+                append(
+                    f"**【{i}】{style}** ({tone})\n"
+                    f"💭 *Why this: {why}*\n"
+                    f"```\n{draft}\n```\n\n"
+                )
         
         # Add link
-        message += f"🔗 [Go to Post]({post['url']})"
+        append(f"🔗 [Go to Post]({post.url})")
         
-        return message
+        return "".join(parts)
     
-    def _format_comment(self, comment: Dict[str, Any], rank: int) -> str:
+    def _format_comment(self, comment: Comment, rank: int, now: float) -> str:
         """Format a single comment
         
         Args:
-            comment: Comment dictionary with analysis
+            comment: Analyzed comment
             rank: Rank number
+            now: Reference Unix time for the time-ago label
             
         Returns:
             Formatted string
         """
-        score = comment.get('score', 0)
-        opportunity_type = comment.get('opportunity_type', 'supplement')
-        product_fit = comment.get('product_fit', 'medium')
-        reply_candidates = comment.get('reply_candidates', [])
-        
-        # Opportunity type emoji & label
-        type_info = {
-            'supplement': ('➕', 'Add Value'),
-            'correct': ('✏️', 'Correct Info'),
-            'alternative': ('🔄', 'Offer Alternative'),
-            'disagree': ('💭', 'Politely Disagree')
-        }.get(opportunity_type, ('💬', 'Reply'))
-        
-        # Product fit emoji
-        fit_emoji = {
-            'high': '🎯',
-            'medium': '🔸',
-            'low': '◽'
-        }.get(product_fit, '🔸')
+        analysis = comment.analysis or {}
+        score = analysis.get('score', 0)
+        opportunity_type = analysis.get('opportunity_type', 'supplement')
+        product_fit = analysis.get('product_fit', 'medium')
+        reply_candidates = analysis.get('reply_candidates', [])
+        
+        type_info = OPPORTUNITY_TYPE_INFO.get(opportunity_type, ('💬', 'Reply'))
+        fit_emoji = FIT_EMOJI.get(product_fit, '🔸')
         
         # Truncate comment body
-        body_preview = comment['body'][:150]
-        if len(comment['body']) > 150:
+        body_preview = comment.body[:150]
+        if len(comment.body) > 150:
             body_preview += "..."
         
-        message = f"""**【#{rank}】⭐ Score: {score:.1f}/10**
-📍 **Original Post:** "{comment['post_title'][:60]}..."
+        parts = []
+        append = parts.append
+        
+        append(f"""**【#{rank}】⭐ Score: {score:.1f}/10**
+📍 **Original Post:** "{comment.post_title[:60]}..."
 💬 Comment: "{body_preview}"
-👤 Author: u/{comment['author']}
-🔥 Engagement: {comment['score']}↑
-⏰ Posted: {self._format_time_ago(comment['created_utc'])}
+👤 Author: u/{comment.author}
+🔥 Engagement: {comment.score}↑
+⏰ Posted: {self._format_time_ago(comment.created_utc, now)}
 {fit_emoji} Product Fit: {product_fit}
 
 {type_info[0]} **Opportunity:** {type_info[1]}
 
-"""
+""")
         
         # Add reply candidates
         if reply_candidates:
-            message += "📋 **Reply Candidates (Copy & Paste Ready):**\n\n"
+            append("📋 **Reply Candidates (Copy & Paste Ready):**\n\n")
             
             for i, candidate in enumerate(reply_candidates, 1):
                 style = candidate.get('style', f'Option {i}')
@@ -201,38 +277,40 @@ class DiscordNotifier:
                 draft = candidate.get('draft', '')
                 why = candidate.get('why', '')
                 
-                message += f"**【{i}】{style}** ({tone})\n"
-                message += f"💭 *Why this: {why}*\n"
-                message += f"```\n{draft}\n```\n\n"
+                append(
+                    f"**【{i}】{style}** ({tone})\n"
+                    f"💭 *Why this: {why}*\n"
+                    f"```\n{draft}\n```\n\n"
+                )
         
         # Add link
-        message += f"🔗 [Go to Comment]({comment['url']})"
+        append(f"🔗 [Go to Comment]({comment.url})")
         
-        return message
+        return "".join(parts)
     
-    def _format_time_ago(self, dt: datetime) -> str:
-        """Format datetime as time ago string
+    def _format_time_ago(self, created_utc: float, now: Optional[float] = None) -> str:
+        """Format a Unix timestamp as time ago string
         
         Args:
-            dt: Datetime object
+            created_utc: Unix timestamp (seconds)
+            now: Reference Unix time (one snapshot per report; current time if None)
             
         Returns:
             Time ago string (e.g., "3 hours ago", "2 days ago")
         """
-        now = datetime.now()
-        diff = now - dt
+        if now is None:
+            now = time.time()
+        
+        seconds = now - created_utc
         
-        hours = diff.total_seconds() / 3600
+        hours = seconds / 3600
         
         if hours < 1:
-            mins = int(diff.total_seconds() / 60)
-            return f"{mins} min{'s' if mins != 1 else ''} ago"
+            return _fmt_ago(int(seconds / 60), 'min')
         elif hours < 24:
-            hrs = int(hours)
-            return f"{hrs} hour{'s' if hrs != 1 else ''} ago"
+            return _fmt_ago(int(hours), 'hour')
         else:
-            days = int(hours / 24)
-            return f"{days} day{'s' if days != 1 else ''} ago"
+            return _fmt_ago(int(hours / 24), 'day')
     
     def _send_message(self, message: str):
         """Send message to Discord webhook
@@ -244,15 +322,19 @@ class DiscordNotifier:
         # Split if necessary
         chunks = self._split_message(message, 1900)
         
+        # Chunks are split on line boundaries, so one post's block can span
+        # several messages; they are posted in order over the keep-alive
+        # session rather than concurrently, which would interleave them
         for chunk in chunks:
-            payload = {
+            payload = _json_dumps({
                 "content": chunk
-            }
+            })
             
             try:
-                response = requests.post(
+                response = self._session.post(
                     self.webhook_url,
-                    json=payload,
+                    data=payload,
+                    headers={'Content-Type': 'application/json'},
                     timeout=10
                 )
                 response.raise_for_status()
@@ -261,7 +343,7 @@ class DiscordNotifier:
                 logger.error(f"Failed to send Discord message: {e}")
     
     def _split_message(self, message: str, max_length: int = 1900) -> List[str]:
-        """Split long message into chunks
+        """Split long message into chunks, on line boundaries where possible
         
         Args:
             message: Full message
@@ -274,18 +356,21 @@ class DiscordNotifier:
             return [message]
         
         chunks = []
-        lines = message.split('\n')
-        current_chunk = ""
-        
-        for line in lines:
-            if len(current_chunk) + len(line) + 1 <= max_length:
-                current_chunk += line + '\n'
+        start = 0
+        length = len(message)
+        
+        # Cut at the last newline within each window (slicing once per chunk);
+        # a single line longer than max_length is hard-split
+        while length - start > max_length:
+            end = message.rfind('\n', start, start + max_length + 1)
+            if end <= start:
+                chunks.append(message[start:start + max_length])
+                start += max_length
             else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = line + '\n'
+                chunks.append(message[start:end])
+                start = end + 1
         
-        if current_chunk:
-            chunks.append(current_chunk)
+        if start < length:
+            chunks.append(message[start:])
         
         return chunks
@@ -0,0 +1,62 @@
+"""Typed records for Reddit posts and comments passed between pipeline stages"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Explicit __slots__ (rather than dataclass(slots=True), which needs Python 3.10)
+# keeps records compact and makes attribute access skip the instance dict.
+# Fields therefore have no defaults; parsers pass every value explicitly.
+
+
+@dataclass
+class Post:
+    """A Reddit post (submission)"""
+
+    __slots__ = (
+        'id', 'title', 'selftext', 'author', 'subreddit', 'score', 'upvote_ratio',
+        'num_comments', 'created_utc', 'url', 'is_self', 'link_flair_text',
+        'text_lower', 'selftext_preview', 'analysis',
+    )
+
+    id: str
+    title: str
+    selftext: str
+    author: str
+    subreddit: str
+    score: int  # Reddit upvotes
+    upvote_ratio: float
+    num_comments: int
+    created_utc: float  # Unix timestamp (seconds)
+    url: str
+    is_self: bool
+    link_flair_text: str
+    # Derived once at parse time, shared by the keyword filter and the prompt builder
+    text_lower: str
+    selftext_preview: str
+    # Gemini analysis (score, topic, reply candidates...), set by ContentAnalyzer
+    analysis: Optional[Dict[str, Any]]
+
+
+@dataclass
+class Comment:
+    """A Reddit comment together with its parent post context"""
+
+    __slots__ = (
+        'id', 'body', 'author', 'score', 'created_utc', 'parent_id', 'post_id',
+        'post_title', 'subreddit', 'url', 'is_submitter', 'depth', 'analysis',
+    )
+
+    id: str
+    body: str
+    author: str
+    score: int  # Reddit upvotes
+    created_utc: float  # Unix timestamp (seconds)
+    parent_id: str
+    post_id: str
+    post_title: str
+    subreddit: str
+    url: str
+    is_submitter: bool
+    depth: int
+    # Gemini analysis (score, opportunity type, reply candidates...), set by ContentAnalyzer
+    analysis: Optional[Dict[str, Any]]
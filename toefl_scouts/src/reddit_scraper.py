@@ -1,59 +1,234 @@
 """Reddit scraping module using public JSON API (no auth required)"""
 
 import requests
-from typing import List, Dict, Any
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Mapping, Optional
+from urllib3.util.retry import Retry
+import json
 import logging
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .models import Comment, Post
+from .response_cache import MAX_CACHE_AGE_DAYS, ResponseCache
+
+# Prefer orjson (parses the raw response bytes directly) when available
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
 # Reddit JSON API base URL
 REDDIT_BASE_URL = "https://www.reddit.com"
 
-# Rate limiting: Reddit allows ~60 requests per minute
-REQUEST_DELAY = 1.0  # seconds between requests
+# Rate limiting: Reddit allows ~60 requests per minute.
+# Token bucket, so idle time can be spent as a burst of back-to-back requests
+RATE_LIMIT_PER_MINUTE = 60
+RATE_LIMIT_BURST = 60.0  # bucket capacity (tokens)
+
+# Transient failures worth retrying (429 honors Retry-After)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Listing requests kept in flight at once (request starts are still rate limited)
+FETCH_WORKERS = 4
+
+# Approximate token budget of the selftext preview sent to Gemini
+# (~500 characters of English text)
+SELFTEXT_PREVIEW_TOKENS = 125
+
+# Trailing "Edit:"/"Update:" sections appended to posts after the fact
+_EDIT_SECTION_RE = re.compile(
+    r'\n\s*\**\s*(?:edit|update)\s*\d*\s*\**\s*:.*\Z', 
+    re.IGNORECASE | re.DOTALL
+)
+
+# Comment bodies that carry no content
+_SKIPPED_BODIES = frozenset(('[deleted]', '[removed]', ''))
+
+# Zero-width space entities Reddit inserts for blank paragraphs
+_ZERO_WIDTH_RE = re.compile(r'(?:&amp;)?#x200B;|\u200b')
+
+
+def _token_slice(text: str, max_tokens: int) -> str:
+    """Truncate text to an approximate token budget
+    
+    Uses a cheap local estimate instead of a tokenizer round-trip:
+    ~4 ASCII characters per token, and 1 token per non-ASCII character
+    (CJK and other scripts tokenize much more densely).
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Approximate token budget
+        
+    Returns:
+        Prefix of text within the budget
+    """
+    if len(text) <= max_tokens:
+        return text
+    
+    budget = max_tokens * 4
+    for i, char in enumerate(text):
+        budget -= 1 if char.isascii() else 4
+        if budget < 0:
+            return text[:i]
+    
+    return text
+
+
+def _selftext_preview(selftext: str) -> str:
+    """Build the selftext preview sent to Gemini
+    
+    Args:
+        selftext: Raw post body
+        
+    Returns:
+        Body without boilerplate, truncated to SELFTEXT_PREVIEW_TOKENS
+    """
+    text = _ZERO_WIDTH_RE.sub('', selftext)
+    text = _EDIT_SECTION_RE.sub('', text).strip()
+    return _token_slice(text, SELFTEXT_PREVIEW_TOKENS)
 
 
 class RedditScraper:
     """Scraper for Reddit posts and comments using public JSON API"""
     
-    def __init__(self, user_agent: str = "TOEFL_Scout/1.0"):
+    def __init__(
+        self, 
+        user_agent: str = "TOEFL_Scout/1.0", 
+        cache_path: Optional[str] = None, 
+        cache_max_age_days: float = MAX_CACHE_AGE_DAYS
+    ):
         """Initialize scraper
         
         Args:
             user_agent: User agent string (required by Reddit)
+            cache_path: Path to the on-disk comment-thread cache (None = no cache)
+            cache_max_age_days: Cached threads older than this are swept
         """
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': user_agent
         })
-        self.last_request_time = 0
+        retries = Retry(
+            total=5,
+            backoff_factor=0.8,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({'GET'}),
+            respect_retry_after_header=True
+        )
+        self.session.mount(
+            'https://', 
+            HTTPAdapter(
+                pool_connections=1, 
+                pool_maxsize=FETCH_WORKERS, 
+                max_retries=retries
+            )
+        )
+        
+        self._tokens = RATE_LIMIT_BURST
+        self._refill_rate = RATE_LIMIT_PER_MINUTE / 60  # tokens per second
+        self._last_refill = time.monotonic()
+        self._rate_lock = threading.Lock()
+        
+        # Comment threads are re-fetched conditionally across runs
+        self._cache = (
+            ResponseCache(cache_path, max_age_days=cache_max_age_days) if cache_path else None
+        )
         
         logger.info("Reddit JSON API scraper initialized")
     
+    def close(self):
+        """Close the HTTP session and the response cache"""
+        self.session.close()
+        if self._cache is not None:
+            self._cache.close()
+    
     def _rate_limit(self):
-        """Ensure we don't exceed rate limits"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < REQUEST_DELAY:
-            time.sleep(REQUEST_DELAY - elapsed)
-        self.last_request_time = time.time()
+        """Ensure we don't exceed rate limits (safe to call from worker threads)"""
+        with self._rate_lock:
+            now = time.monotonic()
+            self._tokens = min(
+                RATE_LIMIT_BURST, 
+                self._tokens + (now - self._last_refill) * self._refill_rate
+            )
+            self._last_refill = now
+            
+            if self._tokens < 1:
+                # Wait for the next token, then spend it right away
+                time.sleep((1 - self._tokens) / self._refill_rate)
+                self._tokens = 0.0
+                self._last_refill = time.monotonic()
+            else:
+                self._tokens -= 1
     
-    def _get_json(self, url: str) -> Dict:
+    def _apply_rate_limit_headers(self, headers: Mapping[str, str]):
+        """Adapt the token bucket to Reddit's reported budget
+        
+        Reddit reports the requests left in the current window and the
+        seconds until it resets; the bucket never holds more tokens than
+        are left, and refills no faster than the remainder can be spread
+        over the window.
+        
+        Args:
+            headers: Response headers
+        """
+        try:
+            remaining = float(headers['X-Ratelimit-Remaining'])
+            reset = max(float(headers['X-Ratelimit-Reset']), 1.0)
+        except (KeyError, ValueError):
+            return
+        
+        with self._rate_lock:
+            self._tokens = min(self._tokens, remaining)
+            self._refill_rate = min(RATE_LIMIT_PER_MINUTE / 60, max(remaining, 1.0) / reset)
+    
+    def _get_json(self, url: str, use_cache: bool = False) -> Dict:
         """Fetch JSON from Reddit API
         
         Args:
             url: Full URL to fetch
+            use_cache: Revalidate against the response cache (ETag / Last-Modified)
+                and reuse the stored body on 304 Not Modified
             
         Returns:
             JSON response as dictionary
         """
         self._rate_limit()
         
+        cache = self._cache if use_cache else None
+        cached = cache.get(url) if cache is not None else None
+        
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
         try:
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
+            
+            if response.status_code == 304 and cached is not None:
+                self._apply_rate_limit_headers(response.headers)
+                cache.touch(url)
+                return _json_loads(cached[2])
+            
             response.raise_for_status()
-            return response.json()
+            self._apply_rate_limit_headers(response.headers)
+            data = _json_loads(response.content)
+            
+            if cache is not None:
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    cache.put(url, etag, last_modified, response.content)
+            
+            return data
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
             return {}
@@ -65,7 +240,7 @@ class RedditScraper:
         subreddits: List[str], 
         time_filter: str = 'day',
         limit: int = 50
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Post]:
         """Fetch posts from specified subreddits using multiple sorting strategies
         
         Strategy: Hot (25%) + Rising (25%) + Top (25%) + New (25%)
@@ -76,51 +251,64 @@ class RedditScraper:
             limit: Maximum number of posts to fetch per subreddit
             
         Returns:
-            List of post dictionaries
+            List of posts
         """
-        all_posts = {}  # Use dict for deduplication
+        seen_ids = set()  # For deduplication across strategies
+        posts_list = []
         per_strategy = limit // 4
         
+        # Fetch from multiple endpoints
+        jobs = []
         for subreddit_name in subreddits:
-            try:
-                # Fetch from multiple endpoints
-                strategies = [
+            jobs.extend(
+                (subreddit_name, strategy_name, url) 
+                for strategy_name, url in [
                     ('hot', f"{REDDIT_BASE_URL}/r/{subreddit_name}/hot.json?limit={per_strategy}"),
                     ('rising', f"{REDDIT_BASE_URL}/r/{subreddit_name}/rising.json?limit={per_strategy}"),
                     ('top', f"{REDDIT_BASE_URL}/r/{subreddit_name}/top.json?t={time_filter}&limit={per_strategy}"),
                     ('new', f"{REDDIT_BASE_URL}/r/{subreddit_name}/new.json?limit={per_strategy}")
                 ]
+            )
+        
+        # Requests overlap on the shared session; _rate_limit still caps their rate
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            responses = list(executor.map(self._get_json, [url for _, _, url in jobs]))
+        
+        counts = {subreddit_name: {} for subreddit_name in subreddits}
+        unique_counts = dict.fromkeys(subreddits, 0)
+        for (subreddit_name, strategy_name, _), data in zip(jobs, responses):
+            try:
+                posts = self._parse_posts(data)
+                counts[subreddit_name][strategy_name] = len(posts)
                 
-                counts = {}
-                for strategy_name, url in strategies:
-                    data = self._get_json(url)
-                    posts = self._parse_posts(data)
-                    counts[strategy_name] = len(posts)
-                    
-                    for post in posts:
-                        all_posts[post['id']] = post
-                
-                logger.info(
-                    f"r/{subreddit_name}: Fetched {len([p for p in all_posts.values() if p['subreddit'].lower() == subreddit_name.lower()])} unique posts "
-                    f"(hot:{counts.get('hot', 0)}, rising:{counts.get('rising', 0)}, "
-                    f"top:{counts.get('top', 0)}, new:{counts.get('new', 0)})"
-                )
+                for post in posts:
+                    if post.id in seen_ids:
+                        continue
+                    seen_ids.add(post.id)
+                    posts_list.append(post)
+                    unique_counts[subreddit_name] += 1
                     
             except Exception as e:
-                logger.error(f"Error fetching from r/{subreddit_name}: {e}")
+                logger.error(f"Error fetching from r/{subreddit_name} ({strategy_name}): {e}")
+        
+        for subreddit_name, sub_counts in counts.items():
+            logger.info(
+                f"r/{subreddit_name}: Fetched {unique_counts[subreddit_name]} unique posts "
+                f"(hot:{sub_counts.get('hot', 0)}, rising:{sub_counts.get('rising', 0)}, "
+                f"top:{sub_counts.get('top', 0)}, new:{sub_counts.get('new', 0)})"
+            )
         
-        posts_list = list(all_posts.values())
         logger.info(f"Total posts fetched: {len(posts_list)}")
         return posts_list
     
-    def _parse_posts(self, data: Dict) -> List[Dict[str, Any]]:
+    def _parse_posts(self, data: Dict) -> List[Post]:
         """Parse posts from Reddit JSON response
         
         Args:
             data: Reddit API response
             
         Returns:
-            List of post dictionaries
+            List of posts
         """
         posts = []
         
@@ -132,21 +320,26 @@ class RedditScraper:
                 continue
             
             post_data = item.get('data', {})
+            title = post_data.get('title', '')
+            selftext = post_data.get('selftext', '')
             
-            posts.append({
-                'id': post_data.get('id', ''),
-                'title': post_data.get('title', ''),
-                'selftext': post_data.get('selftext', ''),
-                'author': post_data.get('author', '[deleted]'),
-                'subreddit': post_data.get('subreddit', ''),
-                'score': post_data.get('score', 0),
-                'upvote_ratio': post_data.get('upvote_ratio', 0),
-                'num_comments': post_data.get('num_comments', 0),
-                'created_utc': datetime.fromtimestamp(post_data.get('created_utc', 0)),
-                'url': f"https://reddit.com{post_data.get('permalink', '')}",
-                'is_self': post_data.get('is_self', True),
-                'link_flair_text': post_data.get('link_flair_text', ''),
-            })
+            posts.append(Post(
+                id=post_data.get('id', ''),
+                title=title,
+                selftext=selftext,
+                author=post_data.get('author', '[deleted]'),
+                subreddit=post_data.get('subreddit', ''),
+                score=post_data.get('score', 0),
+                upvote_ratio=post_data.get('upvote_ratio', 0),
+                num_comments=post_data.get('num_comments', 0),
+                created_utc=post_data.get('created_utc', 0),
+                url=f"https://reddit.com{post_data.get('permalink', '')}",
+                is_self=post_data.get('is_self', True),
+                link_flair_text=post_data.get('link_flair_text', ''),
+                text_lower=(title + ' ' + selftext).lower(),
+                selftext_preview=_selftext_preview(selftext),
+                analysis=None,
+            ))
         
         return posts
     
@@ -154,37 +347,46 @@ class RedditScraper:
     
     def fetch_comments_from_posts(
         self, 
-        posts: List[Dict[str, Any]], 
-        min_score: int = 3
-    ) -> List[Dict[str, Any]]:
+        posts: List[Post], 
+        min_score: int = 3,
+        prune_subtrees: bool = True
+    ) -> List[Comment]:
         """Fetch comments from a list of posts
         
         Args:
-            posts: List of post dictionaries
+            posts: List of posts
             min_score: Minimum comment score to include
+            prune_subtrees: Skip the replies under low-score/deleted comments
             
         Returns:
-            List of comment dictionaries
+            List of comments
         """
         all_comments = []
         
-        for post in posts:
-            try:
-                # Fetch post with comments
-                url = f"{REDDIT_BASE_URL}/r/{post['subreddit']}/comments/{post['id']}.json?limit=100"
-                data = self._get_json(url)
-                
-                if not data or len(data) < 2:
-                    continue
-                
-                # data[0] = post, data[1] = comments
-                comments = self._parse_comments(data[1], post, min_score)
-                
-                logger.debug(f"Post {post['id']}: {len(comments)} comments above threshold")
-                all_comments.extend(comments)
-                
-            except Exception as e:
-                logger.error(f"Error fetching comments for post {post['id']}: {e}")
+        # Fetch posts with comments; requests overlap on the shared session
+        # while _rate_limit caps their rate
+        urls = [
+            f"{REDDIT_BASE_URL}/r/{post.subreddit}/comments/{post.id}.json?limit=100" 
+            for post in posts
+        ]
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            responses = executor.map(lambda url: self._get_json(url, use_cache=True), urls)
+            
+            for post, data in zip(posts, responses):
+                try:
+                    if not data or len(data) < 2:
+                        continue
+                    
+                    # data[0] = post, data[1] = comments
+                    comments = self._parse_comments(
+                        data[1], post, min_score, prune_subtrees
+                    )
+                    
+                    logger.debug(f"Post {post.id}: {len(comments)} comments above threshold")
+                    all_comments.extend(comments)
+                    
+                except Exception as e:
+                    logger.error(f"Error fetching comments for post {post.id}: {e}")
         
         logger.info(f"Total comments fetched: {len(all_comments)}")
         return all_comments
@@ -192,61 +394,79 @@ class RedditScraper:
     def _parse_comments(
         self, 
         data: Dict, 
-        post: Dict[str, Any],
+        post: Post,
         min_score: int = 3,
-        depth: int = 0
-    ) -> List[Dict[str, Any]]:
-        """Parse comments from Reddit JSON response (recursive)
+        prune_subtrees: bool = True
+    ) -> List[Comment]:
+        """Parse comments from Reddit JSON response
+        
+        Walks the reply tree depth-first with an explicit stack (no recursion),
+        producing comments in the same pre-order as the thread.
         
         Args:
             data: Reddit API response for comments
-            post: Parent post dictionary
+            post: Parent post
             min_score: Minimum score to include
-            depth: Current depth in comment tree
+            prune_subtrees: Don't descend into the replies of skipped comments.
+                Reddit sorts the best replies first, so a subtree under a
+                low-score or deleted comment rarely holds one above min_score
             
         Returns:
-            List of comment dictionaries
+            List of comments
         """
         comments = []
         
         if not data or 'data' not in data:
             return comments
         
-        for item in data['data'].get('children', []):
+        # Hot-loop bindings
+        append = comments.append
+        post_id = post.id
+        post_title = post.title
+        subreddit = post.subreddit
+        
+        # Each entry is (iterator over a listing's children, depth of those children)
+        stack = [(iter(data['data'].get('children', ())), 0)]
+        
+        while stack:
+            children, depth = stack[-1]
+            item = next(children, None)
+            if item is None:
+                stack.pop()
+                continue
+            
             if item.get('kind') != 't1':  # t1 = comment
                 continue
             
             comment_data = item.get('data', {})
             
-            # Skip low-score comments
             score = comment_data.get('score', 0)
-            if score < min_score:
-                continue
-            
-            # Skip deleted comments
             body = comment_data.get('body', '')
-            if body in ['[deleted]', '[removed]', '']:
-                continue
             
-            comments.append({
-                'id': comment_data.get('id', ''),
-                'body': body,
-                'author': comment_data.get('author', '[deleted]'),
-                'score': score,
-                'created_utc': datetime.fromtimestamp(comment_data.get('created_utc', 0)),
-                'parent_id': comment_data.get('parent_id', ''),
-                'post_id': post['id'],
-                'post_title': post['title'],
-                'subreddit': post['subreddit'],
-                'url': f"https://reddit.com{comment_data.get('permalink', '')}",
-                'is_submitter': comment_data.get('is_submitter', False),
-                'depth': depth
-            })
-            
-            # Process replies (nested comments)
+            # Skip low-score and deleted comments
+            if score < min_score or body in _SKIPPED_BODIES:
+                if prune_subtrees:
+                    continue
+            else:
+                append(Comment(
+                    id=comment_data.get('id', ''),
+                    body=body,
+                    author=comment_data.get('author', '[deleted]'),
+                    score=score,
+                    created_utc=comment_data.get('created_utc', 0),
+                    parent_id=comment_data.get('parent_id', ''),
+                    post_id=post_id,
+                    post_title=post_title,
+                    subreddit=subreddit,
+                    url=f"https://reddit.com{comment_data.get('permalink', '')}",
+                    is_submitter=comment_data.get('is_submitter', False),
+                    depth=depth,
+                    analysis=None,
+                ))
+            
+            # Descend into replies (nested comments) before the next sibling
             replies = comment_data.get('replies', '')
-            if replies and isinstance(replies, dict):
-                nested = self._parse_comments(replies, post, min_score, depth + 1)
-                comments.extend(nested)
+            if replies and isinstance(replies, dict) and 'data' in replies:
+                stack.append((iter(replies['data'].get('children', ())), depth + 1))
         
         return comments
@@ -0,0 +1,144 @@
+"""On-disk cache of Reddit responses for conditional re-fetches"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+import logging
+
+from .database import INCREMENTAL_VACUUM_PAGES, enable_incremental_vacuum
+
+logger = logging.getLogger(__name__)
+
+# Comment threads are only re-requested while their post is still in the
+# day-window listings, so entries are capped by age and by count
+MAX_CACHE_AGE_DAYS = 3
+MAX_CACHE_ENTRIES = 300
+
+
+class ResponseCache:
+    """SQLite cache of response bodies with their ETag / Last-Modified validators
+    
+    Lets the scraper send If-None-Match / If-Modified-Since and reuse the
+    stored body when Reddit answers 304 Not Modified.
+    """
+    
+    def __init__(
+        self, 
+        db_path: str, 
+        max_age_days: float = MAX_CACHE_AGE_DAYS, 
+        max_entries: int = MAX_CACHE_ENTRIES
+    ):
+        """Open (or create) the cache and sweep old entries
+        
+        Args:
+            db_path: Path to SQLite cache file
+            max_age_days: Entries fetched longer ago than this are dropped
+            max_entries: Number of most recently fetched entries to keep
+        """
+        self.db_path = db_path
+        
+        # Ensure directory exists
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # Shared by the scraper's worker threads (autocommit mode)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        
+        # Must run before WAL is enabled and before the table is created
+        enable_incremental_vacuum(self.conn)
+        
+        self.conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_fetched_at
+            ON responses(fetched_at);
+        ''')
+        
+        self._sweep(max_age_days, max_entries)
+    
+    def close(self):
+        """Close the cache connection"""
+        self.conn.close()
+    
+    def _sweep(self, max_age_days: float, max_entries: int):
+        """Drop stale entries, then keep only the most recently fetched ones
+        
+        Args:
+            max_age_days: Maximum entry age in days
+            max_entries: Number of entries to keep
+        """
+        cutoff = time.time() - max_age_days * 86400
+        
+        deleted = self.conn.execute(
+            'DELETE FROM responses WHERE fetched_at < ?', (cutoff,)
+        ).rowcount
+        
+        deleted += self.conn.execute('''
+            DELETE FROM responses WHERE url NOT IN (
+                SELECT url FROM responses ORDER BY fetched_at DESC LIMIT ?
+            )
+        ''', (max_entries,)).rowcount
+        
+        if deleted > 0:
+            # Give the freed pages back so the file shrinks over time
+            self.conn.executescript(f'PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES});')
+            
+            logger.info(f"Swept {deleted} old cached responses")
+    
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], bytes]]:
+        """Look up a cached response
+        
+        Args:
+            url: Request URL
+            
+        Returns:
+            Tuple of (etag, last_modified, body), or None if not cached
+        """
+        with self._lock:
+            return self.conn.execute(
+                'SELECT etag, last_modified, body FROM responses WHERE url = ?',
+                (url,)
+            ).fetchone()
+    
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes):
+        """Store (or replace) a response
+        
+        Args:
+            url: Request URL
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            body: Raw response body
+        """
+        with self._lock:
+            self.conn.execute('''
+                INSERT INTO responses (url, etag, last_modified, body, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    body = excluded.body,
+                    fetched_at = excluded.fetched_at
+            ''', (url, etag, last_modified, body, time.time()))
+    
+    def touch(self, url: str):
+        """Mark a cached response as still fresh (after a 304)
+        
+        Args:
+            url: Request URL
+        """
+        with self._lock:
+            self.conn.execute(
+                'UPDATE responses SET fetched_at = ? WHERE url = ?',
+                (time.time(), url)
+            )